@@ -1,18 +1,59 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
 from app.schemas.schemas import (
     SentimentAnalysisRequest, SentimentAnalysisResponse,
     AnomalyDetectionRequest, AnomalyDetectionResponse,
-    EducationalFeedbackRequest, EducationalFeedbackResponse
+    EducationalFeedbackRequest, EducationalFeedbackResponse,
+    EducationalFeedbackBatchRequest
 )
-from app.services.ai_service import get_educational_feedback
-from app.services.sentiment_analysis_service import analyze_sentiment
-from app.services.anomaly_detection_service import detect_anomalies
+from app.services.ai_service import (
+    LLM_WORST_CASE_SECONDS,
+    get_educational_feedback, get_educational_feedback_batch, stream_educational_feedback
+)
+from app.services.sentiment_batcher import sentiment_batcher
+from app.services.anomaly_detection_service import detect_anomalies_json
 from app.db.redis import get_redis_client
+from app.db.limiter import concurrency_limiter
+from app.db.cache import cached_or_compute
+import hashlib
 import json
+import math
+import numpy as np
 
 router = APIRouter()
 
-@router.post("/sentiment", response_model=SentimentAnalysisResponse)
+# Admission control for compute-heavy endpoints. Feedback requests can run
+# as long as their LLM calls, so entries only go stale well after that
+# (with a minute of headroom for time queued on the LLM rate limiters)
+limit_concurrency = concurrency_limiter(
+    max_concurrent=50,
+    stale_after=math.ceil(LLM_WORST_CASE_SECONDS) + 60
+)
+
+def feedback_cache_key(request: EducationalFeedbackRequest) -> str:
+    """
+    Cache key shared by single and batched educational feedback
+    
+    Performance is bucketed (ROI into 5% bands, final capital to the
+    nearest power of two) so similar simulations share an LLM response.
+    ROI bands are closed on the right, (-5, 0], (0, 5], ..., so the 0% and
+    15% thresholds in the template feedback never fall inside one band and
+    a cached answer can't describe a gain as a loss.
+    """
+    roi_bucket = capital_bucket = "na"
+    try:
+        roi_bucket = math.ceil(float(request.performance["roi"]) / 5) * 5
+    except (KeyError, TypeError, ValueError, OverflowError):
+        pass
+    try:
+        capital_bucket = round(math.log2(float(request.performance["final_capital"])))
+    except (KeyError, TypeError, ValueError, OverflowError):
+        pass
+    
+    return f"feedback:{request.asset}-{request.strategy}-{request.timeframe}-{roi_bucket}-{capital_bucket}"
+
+@router.post("/sentiment", response_model=SentimentAnalysisResponse, dependencies=[Depends(limit_concurrency)])
 async def sentiment_analysis(
     request: SentimentAnalysisRequest,
     redis=Depends(get_redis_client)
@@ -21,31 +62,26 @@ async def sentiment_analysis(
     Analyze sentiment of financial text
     """
     try:
-        # Check cache first
-        cache_key = f"sentiment:{hash(request.text)}"
-        cached_result = redis.get(cache_key)
-        
-        if cached_result:
-            return SentimentAnalysisResponse.parse_raw(cached_result)
+        # Stable digest so the key matches across workers and restarts
+        key_hash = hashlib.blake2b(request.text.encode(), digest_size=16).hexdigest()
+        cache_key = f"sentiment:{key_hash}"
         
-        # Perform sentiment analysis
-        result = analyze_sentiment(request.text)
-        
-        # Cache result
-        redis.setex(
+        # Serve from cache, or perform sentiment analysis and cache for 1 hour
+        payload = await cached_or_compute(
+            redis,
             cache_key,
-            3600,  # Cache for 1 hour
-            result.json()
+            3600,
+            lambda: sentiment_batcher.submit(request.text)
         )
         
-        return result
+        return Response(content=payload, media_type="application/json")
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
-@router.post("/anomalies", response_model=AnomalyDetectionResponse)
+@router.post("/anomalies", response_model=AnomalyDetectionResponse, dependencies=[Depends(limit_concurrency)])
 async def anomaly_detection(
     request: AnomalyDetectionRequest,
     redis=Depends(get_redis_client)
@@ -54,31 +90,27 @@ async def anomaly_detection(
     Detect anomalies in time series data
     """
     try:
-        # Check cache first
-        cache_key = f"anomalies:{hash(json.dumps(request.data))}-{request.window_size}"
-        cached_result = redis.get(cache_key)
-        
-        if cached_result:
-            return AnomalyDetectionResponse.parse_raw(cached_result)
+        # Convert once; the raw float bytes double as a stable fingerprint
+        data = np.asarray(request.data, dtype=np.float64)
+        key_hash = hashlib.blake2b(data.tobytes(), digest_size=16).hexdigest()
+        cache_key = f"anomalies:{key_hash}-{request.window_size}"
         
-        # Perform anomaly detection
-        result = detect_anomalies(request.data, request.window_size)
-        
-        # Cache result
-        redis.setex(
+        # Serve from cache, or perform anomaly detection and cache for 1 hour
+        payload = await cached_or_compute(
+            redis,
             cache_key,
-            3600,  # Cache for 1 hour
-            result.json()
+            3600,
+            lambda: detect_anomalies_json(data, request.window_size)
         )
         
-        return result
+        return Response(content=payload, media_type="application/json")
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
 
-@router.post("/feedback", response_model=EducationalFeedbackResponse)
+@router.post("/feedback", response_model=EducationalFeedbackResponse, dependencies=[Depends(limit_concurrency)])
 async def educational_feedback(
     request: EducationalFeedbackRequest,
     redis=Depends(get_redis_client)
@@ -87,31 +119,102 @@ async def educational_feedback(
     Generate AI-powered educational feedback for trading simulations
     """
     try:
-        # Check cache first
-        cache_key = f"feedback:{request.asset}-{request.strategy}-{request.timeframe}"
-        cached_result = redis.get(cache_key)
-        
-        if cached_result:
-            return EducationalFeedbackResponse.parse_raw(cached_result)
+        cache_key = feedback_cache_key(request)
         
-        # Generate educational feedback
-        result = get_educational_feedback(
-            asset=request.asset,
-            strategy=request.strategy,
-            timeframe=request.timeframe,
-            performance=request.performance
+        # Serve from cache, or generate educational feedback and cache for 1 hour
+        payload = await cached_or_compute(
+            redis,
+            cache_key,
+            3600,
+            lambda: get_educational_feedback(
+                asset=request.asset,
+                strategy=request.strategy,
+                timeframe=request.timeframe,
+                performance=request.performance
+            )
         )
         
-        # Cache result
-        redis.setex(
-            cache_key,
-            3600,  # Cache for 1 hour
-            result.json()
+        return Response(content=payload, media_type="application/json")
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
         )
+
+@router.post("/feedback/batch", response_model=List[EducationalFeedbackResponse], dependencies=[Depends(limit_concurrency)])
+async def educational_feedback_batch(
+    request: EducationalFeedbackBatchRequest,
+    redis=Depends(get_redis_client)
+):
+    """
+    Generate AI-powered educational feedback for several trading simulations
+    """
+    try:
+        if not request.items:
+            return Response(content=b"[]", media_type="application/json")
+        
+        # Check cache first, for every item in one round-trip
+        cache_keys = [feedback_cache_key(item) for item in request.items]
+        payloads = await redis.mget(cache_keys)
+        misses = [i for i, payload in enumerate(payloads) if not payload]
         
-        return result
+        if misses:
+            # Generate feedback for all misses in batched model calls
+            results = await get_educational_feedback_batch([request.items[i] for i in misses])
+            
+            # Cache results for 1 hour
+            async with redis.pipeline(transaction=False) as pipe:
+                for i, result in zip(misses, results):
+                    payloads[i] = result.model_dump_json().encode()
+                    pipe.setex(cache_keys[i], 3600, payloads[i])
+                await pipe.execute()
+        
+        # Stored values are already JSON, so join them without re-parsing
+        payload = b"[" + b",".join(payloads) + b"]"
+        return Response(content=payload, media_type="application/json")
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+@router.post("/feedback/stream", dependencies=[Depends(limit_concurrency)])
+async def educational_feedback_stream(
+    request: EducationalFeedbackRequest,
+    redis=Depends(get_redis_client)
+):
+    """
+    Stream AI-powered educational feedback as server-sent events
+    
+    Emits "delta" events as the model generates the feedback paragraph, each
+    carrying the next piece of its plain text as a JSON string, then one
+    "feedback" event with the complete EducationalFeedbackResponse.
+    """
+    try:
+        cache_key = feedback_cache_key(request)
+        cached_result = await redis.get(cache_key)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
+    
+    async def event_stream():
+        if cached_result:
+            yield f"event: feedback\ndata: {cached_result.decode()}\n\n"
+            return
+        
+        async for event, data in stream_educational_feedback(
+            asset=request.asset,
+            strategy=request.strategy,
+            timeframe=request.timeframe,
+            performance=request.performance
+        ):
+            if event == "feedback":
+                # Cache result for 1 hour, shared with /feedback
+                await redis.setex(cache_key, 3600, data)
+            else:
+                data = json.dumps(data)
+            yield f"event: {event}\ndata: {data}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
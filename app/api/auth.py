@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from starlette.concurrency import run_in_threadpool
 from app.schemas.schemas import UserCreate, UserLogin, UserResponse, TokenResponse
 from app.db.supabase import get_supabase_client
 
@@ -10,8 +11,8 @@ async def register(user: UserCreate, supabase=Depends(get_supabase_client)):
     Register a new user
     """
     try:
-        # Register user with Supabase Auth
-        response = supabase.auth.sign_up({
+        # Register user with Supabase Auth (blocking HTTP call, run off the event loop)
+        response = await run_in_threadpool(supabase.auth.sign_up, {
             "email": user.email,
             "password": user.password
         })
@@ -40,7 +41,7 @@ async def login(user: UserLogin, supabase=Depends(get_supabase_client)):
     """
     try:
         # Sign in user with Supabase Auth
-        response = supabase.auth.sign_in_with_password({
+        response = await run_in_threadpool(supabase.auth.sign_in_with_password, {
             "email": user.email,
             "password": user.password
         })
@@ -69,7 +70,7 @@ async def logout(supabase=Depends(get_supabase_client)):
     """
     try:
         # Sign out user
-        response = supabase.auth.sign_out()
+        response = await run_in_threadpool(supabase.auth.sign_out)
         
         if response.error:
             raise HTTPException(
@@ -91,7 +92,7 @@ async def reset_password(email: str, supabase=Depends(get_supabase_client)):
     """
     try:
         # Send password reset email
-        response = supabase.auth.reset_password_email(email)
+        response = await run_in_threadpool(supabase.auth.reset_password_email, email)
         
         if response.error:
             raise HTTPException(
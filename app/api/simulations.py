@@ -1,27 +1,96 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from typing import List, Optional
 import random
 import time
 import uuid
+import numpy as np
+from numba import njit
 from app.schemas.schemas import SimulationCreate, SimulationResult, SimulationDataPoint
 from app.db.supabase import get_supabase_client
 from app.db.redis import get_redis_client
+from app.db.limiter import concurrency_limiter
 
 router = APIRouter()
 
+# Admission control for compute-heavy endpoints
+limit_concurrency = concurrency_limiter(max_concurrent=50)
+
+# Sorted set of cached simulation IDs, scored by when their TTL was last set
+SIMULATION_INDEX_KEY = "simulations:index"
+
+# Range of mock returns for each strategy
+STRATEGY_PERFORMANCE_RANGES = {
+    "sma_crossover": (-0.1, 0.3),
+    "ema_crossover": (-0.05, 0.25),
+    "macd": (-0.15, 0.35),
+    "rsi": (-0.2, 0.4),
+    "bollinger": (-0.1, 0.3)
+}
+
+# Shared PCG64 generator; draws a whole simulation's noise in one call
+_rng = np.random.default_rng()
+
+@njit(cache=True)
+def _simulate_core(noise, start_price, volatility):
+    """
+    Numeric core of the mock simulation: random-walk prices plus SMA20 and
+    EMA10 indicators
+
+    `noise` holds one uniform [0, 1) draw per day. Returns three float
+    arrays of the same length; indicator values are NaN until their window
+    is full.
+    """
+    timeframe = noise.shape[0]
+    prices = np.empty(timeframe)
+    sma20 = np.full(timeframe, np.nan)
+    ema10 = np.full(timeframe, np.nan)
+    
+    alpha = 2.0 / 11.0
+    current_price = start_price
+    window_sum = 0.0
+    ema = 0.0
+    
+    for i in range(timeframe):
+        # Random walk price model with some volatility
+        change = current_price * volatility * (noise[i] - 0.5)
+        current_price = max(current_price + change, 0.1)  # Ensure price doesn't go negative
+        price = round(current_price, 2)
+        prices[i] = price
+        
+        # SMA over the last 20 days, kept as a running window sum
+        window_sum += price
+        if i >= 20:
+            window_sum -= prices[i-20]
+        if i >= 19:
+            sma20[i] = round(window_sum / 20, 2)
+        
+        # EMA over 10 days, seeded with the mean of the first 10 prices
+        if i < 9:
+            ema += price
+        elif i == 9:
+            ema = (ema + price) / 10
+            ema10[i] = round(ema, 2)
+        else:
+            ema = alpha * price + (1 - alpha) * ema
+            ema10[i] = round(ema, 2)
+    
+    return prices, sma20, ema10
+
+# Compile once at import so the first request doesn't pay the JIT cost
+_simulate_core(np.zeros(1), 100.0, 0.02)
+
 # Helper function to generate mock simulation data
 def generate_mock_data(asset: str, strategy: str, timeframe: int, initial_capital: float) -> SimulationResult:
     """
     Generate mock simulation data for educational purposes
     """
     # Generate unique ID
-    sim_id = str(uuid.uuid4())
+    sim_id = uuid.uuid4().hex
     
     # Mock user ID
     user_id = "mock-user-id"
     
     # Generate price data with random walk
-    data = []
     start_price = 100
     if asset == "BTC":
         start_price = 30000
@@ -33,44 +102,25 @@ def generate_mock_data(asset: str, strategy: str, timeframe: int, initial_capita
         start_price = 100
         volatility = 0.02
     
-    current_price = start_price
+    # A non-positive timeframe simulates no days
+    prices, sma20, ema10 = _simulate_core(_rng.random(max(timeframe, 0)), float(start_price), volatility)
+    sma20 = [None if np.isnan(v) else v for v in sma20.tolist()]
+    ema10 = [None if np.isnan(v) else v for v in ema10.tolist()]
     
-    for i in range(timeframe):
-        # Random walk price model with some volatility
-        change = current_price * volatility * (random.random() - 0.5)
-        current_price = max(current_price + change, 0.1)  # Ensure price doesn't go negative
-        
-        # Calculate indicators based on strategy
-        sma20 = None
-        ema10 = None
-        
-        if i >= 19:
-            # Calculate SMA for last 20 days
-            sma_prices = [data[j].price for j in range(i-19, i)]
-            sma20 = sum(sma_prices) / 20
-        
-        if i >= 9:
-            # Calculate EMA for last 10 days
-            ema_prices = [data[j].price for j in range(i-9, i)]
-            ema10 = sum(ema_prices) / 10
-        
-        data.append(SimulationDataPoint(
+    # Values come straight from the numeric core, so skip per-point validation
+    data = [
+        SimulationDataPoint.model_construct(
             day=i+1,
-            price=round(current_price, 2),
-            sma20=round(sma20, 2) if sma20 is not None else None,
-            ema10=round(ema10, 2) if ema10 is not None else None
-        ))
+            price=price,
+            sma20=sma,
+            ema10=ema
+        )
+        for i, (price, sma, ema) in enumerate(zip(prices.tolist(), sma20, ema10))
+    ]
     
     # Calculate final capital and ROI based on strategy performance
-    strategy_performance = {
-        "sma_crossover": random.uniform(-0.1, 0.3),
-        "ema_crossover": random.uniform(-0.05, 0.25),
-        "macd": random.uniform(-0.15, 0.35),
-        "rsi": random.uniform(-0.2, 0.4),
-        "bollinger": random.uniform(-0.1, 0.3)
-    }
-    
-    performance = strategy_performance.get(strategy, 0.1)
+    low, high = STRATEGY_PERFORMANCE_RANGES.get(strategy, (0.1, 0.1))
+    performance = random.uniform(low, high)
     final_capital = initial_capital * (1 + performance)
     roi = performance * 100
     
@@ -90,7 +140,7 @@ def generate_mock_data(asset: str, strategy: str, timeframe: int, initial_capita
     
     return result
 
-@router.post("/", response_model=SimulationResult)
+@router.post("/", response_model=SimulationResult, dependencies=[Depends(limit_concurrency)])
 async def create_simulation(
     simulation: SimulationCreate,
     supabase=Depends(get_supabase_client),
@@ -109,14 +159,22 @@ async def create_simulation(
         )
         
         # In a real implementation, we would store this in Supabase
-        # For now, we'll just cache it in Redis
-        redis.setex(
-            f"simulation:{result.id}",
-            3600,  # Cache for 1 hour
-            result.json()
-        )
+        # For now, we'll just cache it in Redis, together with the index
+        # entry, in a single round-trip
+        payload = result.model_dump_json()
+        now = time.time()
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.setex(
+                f"simulation:{result.id}",
+                3600,  # Cache for 1 hour
+                payload
+            )
+            pipe.zadd(SIMULATION_INDEX_KEY, {result.id: now})
+            # Drop index entries whose simulation has already expired
+            pipe.zremrangebyscore(SIMULATION_INDEX_KEY, "-inf", now - 3600)
+            await pipe.execute()
         
-        return result
+        return Response(content=payload, media_type="application/json")
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -132,11 +190,16 @@ async def get_simulation(
     Get simulation by ID
     """
     try:
-        # Try to get from Redis cache
-        cached_simulation = redis.get(f"simulation:{simulation_id}")
+        # Try to get from Redis cache, refreshing its TTL in the same round-trip
+        cache_key = f"simulation:{simulation_id}"
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.get(cache_key)
+            pipe.expire(cache_key, 3600)  # Keep for another hour
+            pipe.zadd(SIMULATION_INDEX_KEY, {simulation_id: time.time()}, xx=True)
+            cached_simulation, _, _ = await pipe.execute()
         
         if cached_simulation:
-            return SimulationResult.parse_raw(cached_simulation)
+            return Response(content=cached_simulation, media_type="application/json")
         
         # If not in cache, return 404
         raise HTTPException(
@@ -154,21 +217,31 @@ async def get_simulation(
 @router.get("/", response_model=List[SimulationResult])
 async def list_simulations(
     limit: Optional[int] = 10,
-    offset: Optional[int] = 0
+    offset: Optional[int] = 0,
+    redis=Depends(get_redis_client)
 ):
     """
-    List simulations (mock implementation)
+    List cached simulations, most recently used first
     """
-    # In a real implementation, we would fetch from Supabase
-    # For now, return mock data
-    mock_simulations = [
-        generate_mock_data(
-            asset=random.choice(["BTC", "ETH", "AAPL", "MSFT", "TSLA"]),
-            strategy=random.choice(["sma_crossover", "ema_crossover", "macd", "rsi", "bollinger"]),
-            timeframe=random.choice([7, 14, 30, 60, 90]),
-            initial_capital=10000.0
+    try:
+        # In a real implementation, we would fetch from Supabase
+        # For now, page through the Redis index and fetch the results in one MGET
+        if limit <= 0:
+            return Response(content=b"[]", media_type="application/json")
+        
+        simulation_ids = await redis.zrevrange(SIMULATION_INDEX_KEY, offset, offset + limit - 1)
+        if not simulation_ids:
+            return Response(content=b"[]", media_type="application/json")
+        
+        cached_simulations = await redis.mget(
+            [b"simulation:" + simulation_id for simulation_id in simulation_ids]
+        )
+        
+        # Stored values are already JSON, so join them without re-parsing
+        payload = b"[" + b",".join(v for v in cached_simulations if v) + b"]"
+        return Response(content=payload, media_type="application/json")
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
         )
-        for _ in range(min(limit, 5))  # Limit to 5 for mock data
-    ]
-    
-    return mock_simulations
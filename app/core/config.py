@@ -1,9 +1,5 @@
-import os
+from functools import lru_cache
 from pydantic_settings import BaseSettings
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
 
 class Settings(BaseSettings):
     # API settings
@@ -18,19 +14,40 @@ class Settings(BaseSettings):
     ]
     
     # Supabase settings
-    SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
-    SUPABASE_KEY: str = os.getenv("SUPABASE_KEY", "")
+    SUPABASE_URL: str = ""
+    SUPABASE_KEY: str = ""
     
     # AI API settings
-    DEEPSEEK_API_KEY: str = os.getenv("DEEPSEEK_API_KEY", "")
-    OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    DEEPSEEK_API_KEY: str = ""
+    OPENAI_API_KEY: str = ""
+    
+    # LLM rate limits, applied to each provider separately
+    LLM_MAX_CONCURRENCY: int = 10
+    LLM_TOKENS_PER_MINUTE: int = 90000
+    
+    # FinBERT sentiment model: a directory holding finbert_int8.onnx and
+    # vocab.txt; leave empty to use keyword matching
+    FINBERT_MODEL_DIR: str = ""
+    FINBERT_NUM_THREADS: int = 0  # ONNX Runtime intra-op threads (0 = runtime default)
+    
+    # Number of reverse proxies in front of the app that append the
+    # connecting address to X-Forwarded-For (0 = clients connect directly)
+    TRUSTED_PROXY_HOPS: int = 0
     
     # Redis settings
-    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
+    REDIS_URL: str = "redis://localhost:6379"
     
     class Config:
+        # Values come from the environment, then the .env file
         env_file = ".env"
         case_sensitive = True
 
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Returns the settings instance, loaded once per process
+    """
+    return Settings()
+
 # Create settings instance
-settings = Settings()
+settings = get_settings()
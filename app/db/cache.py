@@ -0,0 +1,48 @@
+import asyncio
+import inspect
+from typing import Any, Awaitable, Callable, Dict
+
+# Cache misses currently being computed in this worker, by cache key
+_inflight: Dict[str, asyncio.Future] = {}
+
+async def singleflight(key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Run factory() once per key at a time, sharing its result with every
+    concurrent caller for the same key
+    """
+    future = _inflight.get(key)
+
+    if future is None:
+        future = asyncio.ensure_future(factory())
+        _inflight[key] = future
+        future.add_done_callback(lambda _: _inflight.pop(key, None))
+
+    # Shield so one caller disconnecting doesn't cancel the shared work
+    return await asyncio.shield(future)
+
+async def cached_or_compute(redis, key: str, ttl: int, compute: Callable[[], Any]) -> bytes:
+    """
+    Return the cached JSON payload for key, or compute, cache and return it
+
+    compute may be a plain function or a coroutine function returning a
+    Pydantic model or already-encoded JSON bytes; it is only called on a
+    cache miss, and only once for concurrent misses on the same key. The
+    stored bytes are returned as-is so callers can send them without
+    re-parsing.
+    """
+    cached_result = await redis.get(key)
+
+    if cached_result:
+        return cached_result
+
+    async def compute_and_store() -> bytes:
+        result = compute()
+        if inspect.isawaitable(result):
+            result = await result
+
+        payload = result if isinstance(result, bytes) else result.model_dump_json()
+        await redis.setex(key, ttl, payload)
+
+        return payload
+
+    return await singleflight(key, compute_and_store)
@@ -0,0 +1,75 @@
+import time
+import uuid
+from fastapi import Depends, HTTPException, Request, status
+from app.core.config import settings
+from app.db.redis import get_redis_client, redis_client
+
+# Atomically drop stale entries, then admit the request if the client is
+# under its limit. Returns 1 when admitted, 0 when rejected.
+#   KEYS[1]: per-client sorted set of in-flight request IDs
+#   ARGV: now, stale_after, max_concurrent, request_id
+ACQUIRE_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', tonumber(ARGV[1]) - tonumber(ARGV[2]))
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[3]) then
+    redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+# Loaded once and invoked via EVALSHA (falls back to EVAL if Redis lost it)
+acquire_script = redis_client.register_script(ACQUIRE_SCRIPT)
+
+def client_address(request: Request) -> str:
+    """
+    Address of the client that sent the request
+
+    Behind TRUSTED_PROXY_HOPS proxies, this is the X-Forwarded-For entry the
+    outermost of them appended, counted from the right. Entries further left
+    come from the client itself and could be anything, so they are never used.
+    """
+    hops = settings.TRUSTED_PROXY_HOPS
+    if hops > 0:
+        forwarded = [
+            address.strip()
+            for header in request.headers.getlist("x-forwarded-for")
+            for address in header.split(",")
+            if address.strip()
+        ]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    
+    return request.client.host if request.client else "unknown"
+
+def concurrency_limiter(max_concurrent: int = 50, stale_after: int = 60):
+    """
+    Build a dependency limiting how many requests a client may have in flight
+
+    Entries older than stale_after seconds are ignored, so requests whose
+    release never ran (e.g. a crashed worker) cannot lock a client out.
+    Clients are keyed by client_address(), so TRUSTED_PROXY_HOPS must match
+    the deployment; otherwise every user shares the proxy's limit.
+    """
+    async def limit_concurrency(request: Request, redis=Depends(get_redis_client)):
+        key = f"concurrency:{client_address(request)}"
+        request_id = uuid.uuid4().hex
+
+        admitted = await acquire_script(
+            keys=[key],
+            args=[time.time(), stale_after, max_concurrent, request_id],
+            client=redis
+        )
+
+        if not admitted:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many concurrent requests"
+            )
+
+        try:
+            yield
+        finally:
+            await redis.zrem(key, request_id)
+
+    return limit_concurrency
@@ -1,8 +1,17 @@
-import redis
+from redis import asyncio as aioredis
 from app.core.config import settings
 
+# Create a single connection pool, shared by all requests in this worker
+redis_pool = aioredis.ConnectionPool.from_url(
+    settings.REDIS_URL,
+    max_connections=64,
+    socket_keepalive=True,
+    health_check_interval=30,
+    decode_responses=False
+)
+
 # Create Redis client
-redis_client = redis.from_url(settings.REDIS_URL)
+redis_client = aioredis.Redis(connection_pool=redis_pool)
 
 def get_redis_client():
     """
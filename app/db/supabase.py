@@ -1,11 +1,10 @@
+from functools import lru_cache
 from supabase import create_client
 from app.core.config import settings
 
-# Create Supabase client
-supabase = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
-
+@lru_cache
 def get_supabase_client():
     """
-    Returns the Supabase client instance
+    Returns the Supabase client instance, created on first use
     """
-    return supabase
+    return create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.api import auth, simulations, ai
@@ -9,10 +9,10 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Configure CORS
+# Configure CORS (kept as the only middleware so preflights short-circuit first)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,
+    allow_origins=frozenset(settings.CORS_ORIGINS),  # O(1) origin lookup per request
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -23,16 +23,20 @@ app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(simulations.router, prefix="/api/simulations", tags=["Simulations"])
 app.include_router(ai.router, prefix="/api/ai", tags=["AI"])
 
+# Health responses never change, so they are encoded once up front
+ROOT_RESPONSE_BODY = b'{"status":"ok","message":"TradeLite Pro API is running"}'
+HEALTH_RESPONSE_BODY = b'{"status":"healthy","version":"1.0.0"}'
+
 @app.get("/", tags=["Health"])
 async def root():
     """
     Root endpoint for health check
     """
-    return {"status": "ok", "message": "TradeLite Pro API is running"}
+    return Response(content=ROOT_RESPONSE_BODY, media_type="application/json")
 
 @app.get("/health", tags=["Health"])
 async def health_check():
     """
     Health check endpoint
     """
-    return {"status": "healthy", "version": "1.0.0"}
+    return Response(content=HEALTH_RESPONSE_BODY, media_type="application/json")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List, Dict, Any
 
 # Authentication schemas
@@ -71,3 +71,7 @@ class EducationalFeedbackResponse(BaseModel):
     feedback: str
     key_points: List[str]
     improvement_suggestions: List[str]
+
+class EducationalFeedbackBatchRequest(BaseModel):
+    # Bounded so one request can't monopolize the LLM rate limits
+    items: List[EducationalFeedbackRequest] = Field(max_length=50)
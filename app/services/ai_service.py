@@ -1,113 +1,493 @@
-import openai
-import random
+import asyncio
+import json
+import logging
+import re
+import httpx
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Tuple
+from openai import APIConnectionError, AsyncOpenAI, InternalServerError, RateLimitError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 from app.core.config import settings
-from app.schemas.schemas import EducationalFeedbackResponse
+from app.schemas.schemas import EducationalFeedbackRequest, EducationalFeedbackResponse
+from app.services.rate_limiter import LLMRateLimiter, estimate_tokens
 
-# Configure OpenAI API
-openai.api_key = settings.OPENAI_API_KEY
+logger = logging.getLogger(__name__)
+
+# Timeout and retry policy for provider calls
+LLM_TIMEOUT = 30.0
+LLM_MAX_ATTEMPTS = 3
+LLM_MAX_BACKOFF = 4.0
+
+# Longest a feedback request can wait on the providers: every attempt times
+# out with maximum backoff in between, for both providers in turn (streaming
+# tries them one after the other). Time queued on the rate limiters comes on top.
+LLM_WORST_CASE_SECONDS = 2 * (LLM_MAX_ATTEMPTS * LLM_TIMEOUT + (LLM_MAX_ATTEMPTS - 1) * LLM_MAX_BACKOFF)
+
+# Shared HTTP connection pool, so calls after the first reuse open
+# keep-alive (and TLS) connections to the providers
+http_client = httpx.AsyncClient(
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    timeout=LLM_TIMEOUT,
+    http2=True
+)
+
+# Configure OpenAI API (only when a key is configured); retries are
+# handled by _retry_transient below rather than inside the client
+openai_client = AsyncOpenAI(
+    api_key=settings.OPENAI_API_KEY,
+    http_client=http_client,
+    max_retries=0
+) if settings.OPENAI_API_KEY else None
 
 # Configure DeepSeek API (using OpenAI client with custom base URL)
-deepseek_client = openai.OpenAI(
+deepseek_client = AsyncOpenAI(
     api_key=settings.DEEPSEEK_API_KEY,
-    base_url="https://api.deepseek.com/v1"
+    base_url="https://api.deepseek.com/v1",
+    http_client=http_client,
+    max_retries=0
+) if settings.DEEPSEEK_API_KEY else None
+
+# Per-provider throttling, so bursts queue here instead of hitting 429s
+openai_limiter = LLMRateLimiter(settings.LLM_MAX_CONCURRENCY, settings.LLM_TOKENS_PER_MINUTE)
+deepseek_limiter = LLMRateLimiter(settings.LLM_MAX_CONCURRENCY, settings.LLM_TOKENS_PER_MINUTE)
+
+# Retry rate limits, connection errors and 5xx responses with jittered
+# exponential backoff before giving up on a provider
+_retry_transient = retry(
+    retry=retry_if_exception_type((RateLimitError, APIConnectionError, InternalServerError)),
+    stop=stop_after_attempt(LLM_MAX_ATTEMPTS),
+    wait=wait_exponential_jitter(initial=0.5, max=LLM_MAX_BACKOFF),
+    reraise=True
 )
 
-def get_educational_feedback(asset: str, strategy: str, timeframe: int, performance: dict) -> EducationalFeedbackResponse:
+# Simulations described per chat completion in batched feedback requests
+FEEDBACK_BATCH_SIZE = 5
+
+# Prompt text shared by every call. The variable simulation details go at the
+# end of the user message, so the system prompt and instructions form an
+# identical prefix the providers can serve from their prompt caches
+SYSTEM_PROMPT = "You are an educational assistant for trading simulations."
+
+FEEDBACK_INSTRUCTIONS = """Generate educational feedback for the trading simulation described at the end of this message.
+
+Provide detailed educational feedback explaining how the strategy works, what factors might have influenced the performance,
+and what the user could learn from this simulation. Include key points and improvement suggestions.
+
+Respond with a JSON object of the form
+{"feedback": "<detailed feedback paragraph>", "key_points": ["<3-5 key points>"],
+"improvement_suggestions": ["<2-3 improvement suggestions>"]}
+
+Remember this is for educational purposes only and not financial advice.
+"""
+
+BATCH_FEEDBACK_INSTRUCTIONS = """Generate educational feedback for each of the numbered trading simulations listed at the end of this message.
+
+For each simulation, provide detailed educational feedback explaining how the strategy works, what factors might have
+influenced the performance, and what the user could learn from it.
+
+Respond with a JSON object of the form
+{"items": [{"index": <simulation number>, "feedback": "<detailed feedback paragraph>",
+"key_points": ["<3-5 key points>"], "improvement_suggestions": ["<2-3 improvement suggestions>"]}]}
+with one entry per simulation.
+
+Remember this is for educational purposes only and not financial advice.
+"""
+
+# Readable strategy names for prompts and feedback
+STRATEGY_NAMES = {
+    "sma_crossover": "Simple Moving Average Crossover",
+    "ema_crossover": "Exponential Moving Average Crossover",
+    "macd": "Moving Average Convergence Divergence (MACD)",
+    "rsi": "Relative Strength Index (RSI)",
+    "bollinger": "Bollinger Bands"
+}
+
+# Template feedback based on strategy; {asset} and {timeframe} are filled in per call
+STRATEGY_TEMPLATES = {
+    "sma_crossover": {
+        "feedback": "This simulation demonstrates a Simple Moving Average (SMA) Crossover strategy applied to {asset} over {timeframe} days. The strategy involves tracking two moving averages - typically a short-term and long-term SMA - and generating buy signals when the short-term SMA crosses above the long-term SMA, and sell signals when it crosses below. This strategy aims to identify trend changes and can be effective in trending markets, but may generate false signals in sideways or highly volatile markets.",
+        "key_points": [
+            "SMA Crossover strategies work best in trending markets",
+            "The choice of SMA periods significantly impacts performance",
+            "This strategy typically lags behind price movements due to the nature of moving averages",
+            "False signals are common during sideways market conditions"
+        ],
+        "improvement_suggestions": [
+            "Consider adding a confirmation indicator like volume or RSI",
+            "Test different SMA period combinations to optimize for your asset",
+            "Implement a stop-loss strategy to manage downside risk"
+        ]
+    },
+    "ema_crossover": {
+        "feedback": "This simulation demonstrates an Exponential Moving Average (EMA) Crossover strategy applied to {asset} over {timeframe} days. EMA crossover strategies are similar to SMA crossovers but give more weight to recent price data, making them more responsive to new information. The strategy generates buy signals when a shorter-term EMA crosses above a longer-term EMA, and sell signals when it crosses below. EMA crossovers can respond faster to trend changes than SMA crossovers, but this responsiveness can also lead to more false signals in volatile markets.",
+        "key_points": [
+            "EMA Crossover strategies respond faster to price changes than SMA strategies",
+            "The strategy is more sensitive to recent price movements",
+            "While more responsive, EMA crossovers can generate more false signals in volatile markets",
+            "The choice of EMA periods significantly impacts performance"
+        ],
+        "improvement_suggestions": [
+            "Consider using a price filter to reduce false signals",
+            "Test different EMA period combinations to find optimal settings",
+            "Combine with volatility indicators to avoid trading during choppy markets"
+        ]
+    },
+    "macd": {
+        "feedback": "This simulation demonstrates a Moving Average Convergence Divergence (MACD) strategy applied to {asset} over {timeframe} days. MACD is a trend-following momentum indicator that shows the relationship between two moving averages of an asset's price. The MACD line is calculated by subtracting the 26-period EMA from the 12-period EMA. A 9-period EMA of the MACD, called the 'signal line', is then plotted on top of the MACD line. Buy signals typically occur when the MACD line crosses above the signal line, and sell signals when it crosses below. MACD can also show divergence with price, potentially indicating trend reversals.",
+        "key_points": [
+            "MACD combines trend following and momentum in one indicator",
+            "Signal line crossovers are the primary trading signals",
+            "Divergence between MACD and price can indicate potential reversals",
+            "MACD histogram shows the difference between MACD and signal line"
+        ],
+        "improvement_suggestions": [
+            "Use MACD in conjunction with price action analysis",
+            "Consider the overall trend direction before taking MACD signals",
+            "Look for MACD divergence to identify potential trend exhaustion"
+        ]
+    },
+    "rsi": {
+        "feedback": "This simulation demonstrates a Relative Strength Index (RSI) strategy applied to {asset} over {timeframe} days. RSI is a momentum oscillator that measures the speed and change of price movements on a scale from 0 to 100. Traditional interpretation considers RSI values over 70 as overbought and under 30 as oversold, potentially signaling reversal points. RSI strategies can be effective for identifying potential reversal points in the market, but can lead to premature entries during strong trends. The indicator works best in ranging markets and should be used with caution during strong trending periods.",
+        "key_points": [
+            "RSI measures the magnitude of recent price changes to evaluate overbought or oversold conditions",
+            "Traditional overbought level is 70 and oversold level is 30",
+            "RSI can remain in overbought/oversold territory during strong trends",
+            "RSI divergence with price can signal potential trend reversals"
+        ],
+        "improvement_suggestions": [
+            "Adjust the RSI overbought/oversold levels based on the asset's volatility",
+            "Combine RSI with trend indicators to avoid counter-trend trades",
+            "Look for RSI divergence to confirm potential reversal signals"
+        ]
+    },
+    "bollinger": {
+        "feedback": "This simulation demonstrates a Bollinger Bands strategy applied to {asset} over {timeframe} days. Bollinger Bands consist of a middle band (typically a 20-period SMA) with an upper and lower band set at standard deviations away from the middle band. The bands expand and contract based on volatility. Common strategies include buying when the price touches the lower band and selling when it touches the upper band (mean reversion), or entering trades when the price breaks out of the bands after a period of low volatility (volatility expansion). Bollinger Bands are versatile and can be used in both trending and ranging markets with appropriate adjustments.",
+        "key_points": [
+            "Bollinger Bands adapt to market volatility by widening and narrowing",
+            "Price touching the bands alone is not necessarily a signal to trade",
+            "Band width indicates market volatility - narrow bands often precede significant moves",
+            "The middle band (SMA) can act as support/resistance in trending markets"
+        ],
+        "improvement_suggestions": [
+            "Combine with volume indicators to confirm breakouts",
+            "Use additional indicators to determine if the market is trending or ranging",
+            "Consider using Bollinger Band %B or Bandwidth for additional insights"
+        ]
+    }
+}
+
+# Template for strategies without a dedicated one
+DEFAULT_STRATEGY_TEMPLATE = {
+    "feedback": "This simulation demonstrates a {strategy_name} strategy applied to {asset} over {timeframe} days. The performance shows an ROI of {roi}%. Trading strategies can perform differently depending on market conditions, timeframes, and specific assets. It's important to understand the underlying principles of the strategy and how various market factors can influence its performance.",
+    "key_points": [
+        "Different strategies perform better in different market conditions",
+        "Risk management is essential for long-term success",
+        "Past performance is not indicative of future results",
+        "Understanding the underlying principles of a strategy is more valuable than blindly following signals"
+    ],
+    "improvement_suggestions": [
+        "Backtest the strategy across different market conditions",
+        "Consider combining multiple indicators for confirmation",
+        "Implement proper position sizing and risk management rules"
+    ]
+}
+
+async def get_educational_feedback(asset: str, strategy: str, timeframe: int, performance: dict) -> EducationalFeedbackResponse:
     """
     Generate AI-powered educational feedback for trading simulations
     
-    This function tries to use DeepSeek API first, then falls back to OpenAI,
-    and finally uses a template-based approach if both APIs fail.
+    This function queries DeepSeek and OpenAI concurrently and returns the
+    first successful answer, cancelling the other request. It uses a
+    template-based approach if both APIs fail.
     """
     try:
-        # Try DeepSeek API first
+        # Start every configured provider at once
+        providers = {}
         if settings.DEEPSEEK_API_KEY:
-            try:
-                return _get_deepseek_feedback(asset, strategy, timeframe, performance)
-            except Exception as e:
-                print(f"DeepSeek API error: {str(e)}")
-                # Fall through to OpenAI
-        
-        # Try OpenAI API next
+            providers["DeepSeek"] = _get_deepseek_feedback(asset, strategy, timeframe, performance)
         if settings.OPENAI_API_KEY:
-            try:
-                return _get_openai_feedback(asset, strategy, timeframe, performance)
-            except Exception as e:
-                print(f"OpenAI API error: {str(e)}")
-                # Fall through to template
+            providers["OpenAI"] = _get_openai_feedback(asset, strategy, timeframe, performance)
+        
+        result = await _first_successful(providers)
+        if result is not None:
+            return result
         
         # Fallback to template-based feedback
         return _get_template_feedback(asset, strategy, timeframe, performance)
     
-    except Exception as e:
+    except Exception:
         # Final fallback
-        print(f"Error generating feedback: {str(e)}")
+        logger.exception("Error generating feedback")
         return EducationalFeedbackResponse(
             feedback="Unable to generate feedback at this time. Please try again later.",
             key_points=["System is currently experiencing issues."],
             improvement_suggestions=["Please try again later."]
         )
 
-def _get_deepseek_feedback(asset: str, strategy: str, timeframe: int, performance: dict) -> EducationalFeedbackResponse:
-    """Generate feedback using DeepSeek API"""
+async def get_educational_feedback_batch(items: List[EducationalFeedbackRequest]) -> List[EducationalFeedbackResponse]:
+    """
+    Generate educational feedback for several trading simulations at once
     
-    # Format the strategy name for better readability
-    strategy_name = {
-        "sma_crossover": "Simple Moving Average Crossover",
-        "ema_crossover": "Exponential Moving Average Crossover",
-        "macd": "Moving Average Convergence Divergence (MACD)",
-        "rsi": "Relative Strength Index (RSI)",
-        "bollinger": "Bollinger Bands"
-    }.get(strategy, strategy)
-    
-    # Create prompt for DeepSeek
-    prompt = f"""
-    Generate educational feedback for a trading simulation with the following parameters:
-    - Asset: {asset}
-    - Strategy: {strategy_name}
-    - Timeframe: {timeframe} days
-    - Performance: ROI of {performance.get('roi', 'unknown')}%, Final capital: ${performance.get('final_capital', 'unknown')}
-    
-    Provide detailed educational feedback explaining how this strategy works, what factors might have influenced the performance,
-    and what the user could learn from this simulation. Include key points and improvement suggestions.
-    
-    Format the response as:
-    1. Detailed feedback paragraph
-    2. List of 3-5 key points
-    3. List of 2-3 improvement suggestions
-    
-    Remember this is for educational purposes only and not financial advice.
+    Items are sent FEEDBACK_BATCH_SIZE at a time, each group as a single chat
+    completion raced across the configured providers. Items the APIs fail to
+    cover get template-based feedback.
     """
+    groups = [items[i:i + FEEDBACK_BATCH_SIZE] for i in range(0, len(items), FEEDBACK_BATCH_SIZE)]
     
-    # Call DeepSeek API
-    response = deepseek_client.chat.completions.create(
-        model="deepseek-chat",
-        messages=[
-            {"role": "system", "content": "You are an educational assistant for trading simulations."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.7,
-        max_tokens=1000
+    async def generate_group(group):
+        providers = {}
+        if settings.DEEPSEEK_API_KEY:
+            providers["DeepSeek"] = _get_feedback_batch(deepseek_client, deepseek_limiter, "deepseek-chat", group)
+        if settings.OPENAI_API_KEY:
+            providers["OpenAI"] = _get_feedback_batch(openai_client, openai_limiter, "gpt-4o", group)
+        
+        try:
+            results = await _first_successful(providers) or [None] * len(group)
+        except Exception:
+            logger.exception("Error generating feedback")
+            results = [None] * len(group)
+        
+        return [
+            result or _get_template_feedback(item.asset, item.strategy, item.timeframe, item.performance)
+            for item, result in zip(group, results)
+        ]
+    
+    grouped_results = await asyncio.gather(*(generate_group(group) for group in groups))
+    return [result for group_results in grouped_results for result in group_results]
+
+async def _first_successful(providers: Dict[str, Awaitable[Any]]) -> Any:
+    """
+    Run provider calls concurrently and return the first successful result
+    
+    Failed calls are logged and the remaining ones awaited; calls still
+    running once a result is in are cancelled. Returns None if all fail.
+    """
+    tasks = {asyncio.ensure_future(call): name for name, call in providers.items()}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                logger.error("%s API error", tasks[task], exc_info=task.exception())
+                # Keep waiting on the remaining providers
+    finally:
+        # Cancel whichever providers lost the race
+        for task in pending:
+            task.cancel()
+    
+    return None
+
+@_retry_transient
+async def _get_feedback_batch(client: AsyncOpenAI, limiter: LLMRateLimiter, model: str, items: List[EducationalFeedbackRequest]) -> List[Optional[EducationalFeedbackResponse]]:
+    """Generate feedback for several simulations with one chat completion"""
+    
+    simulations = "\n".join(
+        f"{index}. Asset: {item.asset}; Strategy: {STRATEGY_NAMES.get(item.strategy, item.strategy)}; "
+        f"Timeframe: {item.timeframe} days; Performance: ROI of {item.performance.get('roi', 'unknown')}%, "
+        f"Final capital: ${item.performance.get('final_capital', 'unknown')}"
+        for index, item in enumerate(items)
     )
     
-    # Parse response
-    content = response.choices[0].message.content
+    # Create one prompt covering every simulation
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"{BATCH_FEEDBACK_INSTRUCTIONS}\n---\n{simulations}"}
+    ]
+    max_tokens = 800 * len(items)
+    
+    async with limiter.limit(estimate_tokens(messages, max_tokens)):
+        response = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            response_format={"type": "json_object"},
+            temperature=0.7,
+            max_tokens=max_tokens
+        )
+    
+    # Map the entries back to their simulations by index; a malformed entry
+    # only costs its own simulation, which then gets template feedback
+    results = [None] * len(items)
+    for entry in json.loads(response.choices[0].message.content).get("items") or []:
+        try:
+            index = entry["index"]
+            if isinstance(index, int) and 0 <= index < len(items) and entry.get("feedback"):
+                results[index] = _feedback_from_answer(entry)
+        except Exception:
+            logger.exception("Malformed batch feedback entry")
+    
+    return results
+
+class _FeedbackTextStream:
+    """
+    Pull the "feedback" string out of a model's JSON answer as it streams in
+
+    feed() takes the next raw chunk and returns whatever newly arrived text of
+    the feedback paragraph can already be decoded, so clients are sent plain
+    text rather than JSON fragments. Escapes split across chunks are held
+    back until they are complete.
+    """
+
+    KEY = re.compile(r'"feedback"\s*:\s*"')
+    ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+    def __init__(self):
+        self._buffer = ""
+        self._position = None  # Next undecoded character of the value, once found
+        self._done = False
+
+    def feed(self, chunk: str) -> str:
+        self._buffer += chunk
+        if self._done:
+            return ""
+        if self._position is None:
+            match = self.KEY.search(self._buffer)
+            if match is None:
+                return ""
+            self._position = match.end()
+
+        buffer, i, text = self._buffer, self._position, []
+        while i < len(buffer):
+            char = buffer[i]
+            if char == '"':
+                self._done = True
+                break
+            if char != '\\':
+                text.append(char)
+                i += 1
+                continue
+            if i + 1 >= len(buffer):
+                break
+            if buffer[i + 1] != 'u':
+                text.append(self.ESCAPES.get(buffer[i + 1], buffer[i + 1]))
+                i += 2
+                continue
+            if i + 6 > len(buffer):
+                break
+            code = self._hex(buffer[i + 2:i + 6])
+            if 0xD800 <= code < 0xDC00:
+                # High surrogate: decode together with the low half that follows
+                if i + 12 > len(buffer):
+                    break
+                low = self._hex(buffer[i + 8:i + 12]) if buffer[i + 6:i + 8] == '\\u' else -1
+                if 0xDC00 <= low < 0xE000:
+                    text.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                    i += 12
+                    continue
+                code = -1
+            text.append(chr(code) if 0 <= code and not 0xDC00 <= code < 0xE000 else '\ufffd')
+            i += 6
+
+        self._position = i
+        return "".join(text)
+
+    @staticmethod
+    def _hex(digits: str) -> int:
+        try:
+            return int(digits, 16)
+        except ValueError:
+            return -1
+
+async def stream_educational_feedback(asset: str, strategy: str, timeframe: int, performance: dict) -> AsyncIterator[Tuple[str, str]]:
+    """
+    Stream educational feedback as it is generated
+    
+    Yields ("delta", text) events carrying plain text of the feedback
+    paragraph as the first configured provider that responds generates it
+    (decoded from the model's JSON answer), then one ("feedback", json) event
+    with the parsed EducationalFeedbackResponse. Falls back to the next
+    provider if one fails before any text was sent, and to template-based
+    feedback otherwise (including when the answer can't be parsed).
+    """
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": _build_feedback_prompt(asset, strategy, timeframe, performance)}
+    ]
+    
+    providers = []
+    if settings.DEEPSEEK_API_KEY:
+        providers.append(("DeepSeek", deepseek_client, deepseek_limiter, "deepseek-chat"))
+    if settings.OPENAI_API_KEY:
+        providers.append(("OpenAI", openai_client, openai_limiter, "gpt-4o"))
+    
+    for name, client, limiter, model in providers:
+        content = []
+        feedback_text = _FeedbackTextStream()
+        sent = False
+        try:
+            async with limiter.limit(estimate_tokens(messages, 1000)):
+                stream = await _open_stream(
+                    client,
+                    model=model,
+                    messages=messages,
+                    response_format={"type": "json_object"},
+                    temperature=0.7,
+                    max_tokens=1000
+                )
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        content.append(delta)
+                        text = feedback_text.feed(delta)
+                        if text:
+                            sent = True
+                            yield "delta", text
+        except Exception:
+            logger.exception("%s API error", name)
+            if sent:
+                # The client already has part of this answer; don't mix in another
+                break
+            continue
+        
+        # Parse once the whole answer is in
+        try:
+            feedback = _parse_feedback_content("".join(content))
+        except Exception:
+            # e.g. JSON cut off by max_tokens; once text was sent, don't mix
+            # in another provider's answer
+            logger.exception("%s API error", name)
+            if sent:
+                break
+            continue
+        
+        yield "feedback", feedback.model_dump_json()
+        return
     
-    # Extract sections (simple parsing)
-    sections = content.split("\n\n")
-    feedback = sections[0] if len(sections) > 0 else ""
+    yield "feedback", _get_template_feedback(asset, strategy, timeframe, performance).model_dump_json()
+
+@_retry_transient
+async def _open_stream(client: AsyncOpenAI, **kwargs):
+    """Start a streamed chat completion; retried only until the stream opens"""
     
-    # Extract key points and suggestions
-    key_points = []
-    improvement_suggestions = []
+    return await client.chat.completions.create(stream=True, **kwargs)
+
+def _build_feedback_prompt(asset: str, strategy: str, timeframe: int, performance: dict) -> str:
+    """Build the chat prompt asking for feedback on one simulation"""
     
-    for section in sections:
-        if "key point" in section.lower():
-            points = [p.strip("- ") for p in section.split("\n")[1:] if p.strip()]
-            key_points.extend(points)
-        elif "improvement" in section.lower() or "suggestion" in section.lower():
-            suggestions = [s.strip("- ") for s in section.split("\n")[1:] if s.strip()]
-            improvement_suggestions.extend(suggestions)
+    # Format the strategy name for better readability
+    strategy_name = STRATEGY_NAMES.get(strategy, strategy)
+    
+    return f"""{FEEDBACK_INSTRUCTIONS}
+---
+Asset: {asset}
+Strategy: {strategy_name}
+Timeframe: {timeframe} days
+Performance: ROI of {performance.get('roi', 'unknown')}%, Final capital: ${performance.get('final_capital', 'unknown')}
+"""
+
+def _parse_feedback_content(content: str) -> EducationalFeedbackResponse:
+    """Parse a model's JSON answer into feedback, key points and suggestions"""
+    
+    return _feedback_from_answer(json.loads(content))
+
+def _feedback_from_answer(data: dict) -> EducationalFeedbackResponse:
+    """Build feedback from one decoded answer object, filling in defaults"""
+    
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object, got {type(data).__name__}")
+    
+    key_points = data.get("key_points") or []
+    improvement_suggestions = data.get("improvement_suggestions") or []
     
     # Ensure we have some content
     if not key_points:
@@ -117,186 +497,69 @@ def _get_deepseek_feedback(asset: str, strategy: str, timeframe: int, performanc
         improvement_suggestions = ["Consider backtesting with different parameters", "Combine with other indicators for confirmation"]
     
     return EducationalFeedbackResponse(
-        feedback=feedback,
+        feedback=data.get("feedback", ""),
         key_points=key_points[:5],  # Limit to 5 key points
         improvement_suggestions=improvement_suggestions[:3]  # Limit to 3 suggestions
     )
 
-def _get_openai_feedback(asset: str, strategy: str, timeframe: int, performance: dict) -> EducationalFeedbackResponse:
-    """Generate feedback using OpenAI API"""
+@_retry_transient
+async def _get_deepseek_feedback(asset: str, strategy: str, timeframe: int, performance: dict) -> EducationalFeedbackResponse:
+    """Generate feedback using DeepSeek API"""
     
-    # Format the strategy name for better readability
-    strategy_name = {
-        "sma_crossover": "Simple Moving Average Crossover",
-        "ema_crossover": "Exponential Moving Average Crossover",
-        "macd": "Moving Average Convergence Divergence (MACD)",
-        "rsi": "Relative Strength Index (RSI)",
-        "bollinger": "Bollinger Bands"
-    }.get(strategy, strategy)
-    
-    # Create prompt for OpenAI
-    prompt = f"""
-    Generate educational feedback for a trading simulation with the following parameters:
-    - Asset: {asset}
-    - Strategy: {strategy_name}
-    - Timeframe: {timeframe} days
-    - Performance: ROI of {performance.get('roi', 'unknown')}%, Final capital: ${performance.get('final_capital', 'unknown')}
-    
-    Provide detailed educational feedback explaining how this strategy works, what factors might have influenced the performance,
-    and what the user could learn from this simulation. Include key points and improvement suggestions.
-    
-    Format the response as:
-    1. Detailed feedback paragraph
-    2. List of 3-5 key points
-    3. List of 2-3 improvement suggestions
-    
-    Remember this is for educational purposes only and not financial advice.
-    """
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": _build_feedback_prompt(asset, strategy, timeframe, performance)}
+    ]
     
-    # Call OpenAI API
-    response = openai.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {"role": "system", "content": "You are an educational assistant for trading simulations."},
-            {"role": "user", "content": prompt}
-        ],
-        temperature=0.7,
-        max_tokens=1000
-    )
+    # Call DeepSeek API
+    async with deepseek_limiter.limit(estimate_tokens(messages, 1000)):
+        response = await deepseek_client.chat.completions.create(
+            model="deepseek-chat",
+            messages=messages,
+            response_format={"type": "json_object"},
+            temperature=0.7,
+            max_tokens=1000
+        )
     
     # Parse response
-    content = response.choices[0].message.content
-    
-    # Extract sections (simple parsing)
-    sections = content.split("\n\n")
-    feedback = sections[0] if len(sections) > 0 else ""
-    
-    # Extract key points and suggestions
-    key_points = []
-    improvement_suggestions = []
+    return _parse_feedback_content(response.choices[0].message.content)
+
+@_retry_transient
+async def _get_openai_feedback(asset: str, strategy: str, timeframe: int, performance: dict) -> EducationalFeedbackResponse:
+    """Generate feedback using OpenAI API"""
     
-    for section in sections:
-        if "key point" in section.lower():
-            points = [p.strip("- ") for p in section.split("\n")[1:] if p.strip()]
-            key_points.extend(points)
-        elif "improvement" in section.lower() or "suggestion" in section.lower():
-            suggestions = [s.strip("- ") for s in section.split("\n")[1:] if s.strip()]
-            improvement_suggestions.extend(suggestions)
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": _build_feedback_prompt(asset, strategy, timeframe, performance)}
+    ]
     
-    # Ensure we have some content
-    if not key_points:
-        key_points = ["Understanding market trends", "Risk management is essential", "Past performance is not indicative of future results"]
-    
-    if not improvement_suggestions:
-        improvement_suggestions = ["Consider backtesting with different parameters", "Combine with other indicators for confirmation"]
+    # Call OpenAI API
+    async with openai_limiter.limit(estimate_tokens(messages, 1000)):
+        response = await openai_client.chat.completions.create(
+            model="gpt-4o",
+            messages=messages,
+            response_format={"type": "json_object"},
+            temperature=0.7,
+            max_tokens=1000
+        )
     
-    return EducationalFeedbackResponse(
-        feedback=feedback,
-        key_points=key_points[:5],  # Limit to 5 key points
-        improvement_suggestions=improvement_suggestions[:3]  # Limit to 3 suggestions
-    )
+    # Parse response
+    return _parse_feedback_content(response.choices[0].message.content)
 
 def _get_template_feedback(asset: str, strategy: str, timeframe: int, performance: dict) -> EducationalFeedbackResponse:
     """Generate template-based feedback when APIs are unavailable"""
     
     # Format the strategy name for better readability
-    strategy_name = {
-        "sma_crossover": "Simple Moving Average Crossover",
-        "ema_crossover": "Exponential Moving Average Crossover",
-        "macd": "Moving Average Convergence Divergence (MACD)",
-        "rsi": "Relative Strength Index (RSI)",
-        "bollinger": "Bollinger Bands"
-    }.get(strategy, strategy)
-    
-    # Template feedback based on strategy
-    strategy_templates = {
-        "sma_crossover": {
-            "feedback": f"This simulation demonstrates a Simple Moving Average (SMA) Crossover strategy applied to {asset} over {timeframe} days. The strategy involves tracking two moving averages - typically a short-term and long-term SMA - and generating buy signals when the short-term SMA crosses above the long-term SMA, and sell signals when it crosses below. This strategy aims to identify trend changes and can be effective in trending markets, but may generate false signals in sideways or highly volatile markets.",
-            "key_points": [
-                "SMA Crossover strategies work best in trending markets",
-                "The choice of SMA periods significantly impacts performance",
-                "This strategy typically lags behind price movements due to the nature of moving averages",
-                "False signals are common during sideways market conditions"
-            ],
-            "improvement_suggestions": [
-                "Consider adding a confirmation indicator like volume or RSI",
-                "Test different SMA period combinations to optimize for your asset",
-                "Implement a stop-loss strategy to manage downside risk"
-            ]
-        },
-        "ema_crossover": {
-            "feedback": f"This simulation demonstrates an Exponential Moving Average (EMA) Crossover strategy applied to {asset} over {timeframe} days. EMA crossover strategies are similar to SMA crossovers but give more weight to recent price data, making them more responsive to new information. The strategy generates buy signals when a shorter-term EMA crosses above a longer-term EMA, and sell signals when it crosses below. EMA crossovers can respond faster to trend changes than SMA crossovers, but this responsiveness can also lead to more false signals in volatile markets.",
-            "key_points": [
-                "EMA Crossover strategies respond faster to price changes than SMA strategies",
-                "The strategy is more sensitive to recent price movements",
-                "While more responsive, EMA crossovers can generate more false signals in volatile markets",
-                "The choice of EMA periods significantly impacts performance"
-            ],
-            "improvement_suggestions": [
-                "Consider using a price filter to reduce false signals",
-                "Test different EMA period combinations to find optimal settings",
-                "Combine with volatility indicators to avoid trading during choppy markets"
-            ]
-        },
-        "macd": {
-            "feedback": f"This simulation demonstrates a Moving Average Convergence Divergence (MACD) strategy applied to {asset} over {timeframe} days. MACD is a trend-following momentum indicator that shows the relationship between two moving averages of an asset's price. The MACD line is calculated by subtracting the 26-period EMA from the 12-period EMA. A 9-period EMA of the MACD, called the 'signal line', is then plotted on top of the MACD line. Buy signals typically occur when the MACD line crosses above the signal line, and sell signals when it crosses below. MACD can also show divergence with price, potentially indicating trend reversals.",
-            "key_points": [
-                "MACD combines trend following and momentum in one indicator",
-                "Signal line crossovers are the primary trading signals",
-                "Divergence between MACD and price can indicate potential reversals",
-                "MACD histogram shows the difference between MACD and signal line"
-            ],
-            "improvement_suggestions": [
-                "Use MACD in conjunction with price action analysis",
-                "Consider the overall trend direction before taking MACD signals",
-                "Look for MACD divergence to identify potential trend exhaustion"
-            ]
-        },
-        "rsi": {
-            "feedback": f"This simulation demonstrates a Relative Strength Index (RSI) strategy applied to {asset} over {timeframe} days. RSI is a momentum oscillator that measures the speed and change of price movements on a scale from 0 to 100. Traditional interpretation considers RSI values over 70 as overbought and under 30 as oversold, potentially signaling reversal points. RSI strategies can be effective for identifying potential reversal points in the market, but can lead to premature entries during strong trends. The indicator works best in ranging markets and should be used with caution during strong trending periods.",
-            "key_points": [
-                "RSI measures the magnitude of recent price changes to evaluate overbought or oversold conditions",
-                "Traditional overbought level is 70 and oversold level is 30",
-                "RSI can remain in overbought/oversold territory during strong trends",
-                "RSI divergence with price can signal potential trend reversals"
-            ],
-            "improvement_suggestions": [
-                "Adjust the RSI overbought/oversold levels based on the asset's volatility",
-                "Combine RSI with trend indicators to avoid counter-trend trades",
-                "Look for RSI divergence to confirm potential reversal signals"
-            ]
-        },
-        "bollinger": {
-            "feedback": f"This simulation demonstrates a Bollinger Bands strategy applied to {asset} over {timeframe} days. Bollinger Bands consist of a middle band (typically a 20-period SMA) with an upper and lower band set at standard deviations away from the middle band. The bands expand and contract based on volatility. Common strategies include buying when the price touches the lower band and selling when it touches the upper band (mean reversion), or entering trades when the price breaks out of the bands after a period of low volatility (volatility expansion). Bollinger Bands are versatile and can be used in both trending and ranging markets with appropriate adjustments.",
-            "key_points": [
-                "Bollinger Bands adapt to market volatility by widening and narrowing",
-                "Price touching the bands alone is not necessarily a signal to trade",
-                "Band width indicates market volatility - narrow bands often precede significant moves",
-                "The middle band (SMA) can act as support/resistance in trending markets"
-            ],
-            "improvement_suggestions": [
-                "Combine with volume indicators to confirm breakouts",
-                "Use additional indicators to determine if the market is trending or ranging",
-                "Consider using Bollinger Band %B or Bandwidth for additional insights"
-            ]
-        }
-    }
+    strategy_name = STRATEGY_NAMES.get(strategy, strategy)
     
     # Get template for the strategy or use a default template
-    template = strategy_templates.get(strategy, {
-        "feedback": f"This simulation demonstrates a {strategy_name} strategy applied to {asset} over {timeframe} days. The performance shows an ROI of {performance.get('roi', 'unknown')}%. Trading strategies can perform differently depending on market conditions, timeframes, and specific assets. It's important to understand the underlying principles of the strategy and how various market factors can influence its performance.",
-        "key_points": [
-            "Different strategies perform better in different market conditions",
-            "Risk management is essential for long-term success",
-            "Past performance is not indicative of future results",
-            "Understanding the underlying principles of a strategy is more valuable than blindly following signals"
-        ],
-        "improvement_suggestions": [
-            "Backtest the strategy across different market conditions",
-            "Consider combining multiple indicators for confirmation",
-            "Implement proper position sizing and risk management rules"
-        ]
-    })
+    template = STRATEGY_TEMPLATES.get(strategy, DEFAULT_STRATEGY_TEMPLATE)
+    template_feedback = template['feedback'].format(
+        asset=asset,
+        timeframe=timeframe,
+        strategy_name=strategy_name,
+        roi=performance.get('roi', 'unknown')
+    )
     
     # Add performance-specific feedback
     roi = performance.get('roi', 0)
@@ -308,7 +571,7 @@ def _get_template_feedback(asset: str, strategy: str, timeframe: int, performanc
         performance_feedback = f"The strategy resulted in a negative ROI of {roi}%. This provides a valuable learning opportunity to understand what factors contributed to the underperformance."
     
     # Combine template feedback with performance feedback
-    combined_feedback = f"{template['feedback']} {performance_feedback}"
+    combined_feedback = f"{template_feedback} {performance_feedback}"
     
     return EducationalFeedbackResponse(
         feedback=combined_feedback,
@@ -1,9 +1,13 @@
-import random
 import numpy as np
-from typing import List
+import orjson
+from numpy.lib.stride_tricks import sliding_window_view
+from typing import List, Tuple, Union
 from app.schemas.schemas import AnomalyDetectionResponse
 
-def detect_anomalies(data: List[float], window_size: int = 20) -> AnomalyDetectionResponse:
+# Window values processed per block when scoring, bounding temporary memory
+WINDOW_BLOCK_ELEMENTS = 1 << 20
+
+def detect_anomalies(data: Union[List[float], np.ndarray], window_size: int = 20) -> AnomalyDetectionResponse:
     """
     Detect anomalies in time series data using a simple statistical approach
     
@@ -11,49 +15,58 @@ def detect_anomalies(data: List[float], window_size: int = 20) -> AnomalyDetecti
     In a production environment, more sophisticated methods like Isolation Forest,
     DBSCAN, or LSTM autoencoders would be used.
     """
+    anomalies, scores, threshold = _score_anomalies(data, window_size)
+    
+    return AnomalyDetectionResponse(
+        anomalies=anomalies.tolist(),
+        scores=scores.tolist(),
+        threshold=threshold
+    )
+
+def detect_anomalies_json(data: Union[List[float], np.ndarray], window_size: int = 20) -> bytes:
+    """
+    Detect anomalies and return the AnomalyDetectionResponse as JSON bytes
+    
+    The score arrays are serialized straight from NumPy, without building a
+    Python float per point.
+    """
+    anomalies, scores, threshold = _score_anomalies(data, window_size)
+    
+    return orjson.dumps(
+        {"anomalies": anomalies, "scores": scores, "threshold": threshold},
+        option=orjson.OPT_SERIALIZE_NUMPY
+    )
+
+def _score_anomalies(data: Union[List[float], np.ndarray], window_size: int) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Z-score every point against its preceding window; returns (anomaly indices, scores, threshold)"""
+    
+    threshold = 3.0  # Z-score threshold for anomaly detection
+    
     if len(data) < window_size:
         # Not enough data points
-        return AnomalyDetectionResponse(
-            anomalies=[],
-            scores=[0.0] * len(data),
-            threshold=3.0
-        )
-    
-    # Convert to numpy array for easier manipulation
-    data_array = np.array(data)
-    scores = []
-    anomalies = []
-    threshold = 3.0  # Z-score threshold for anomaly detection
+        return np.empty(0, dtype=np.int64), np.zeros(len(data)), threshold
     
-    # Calculate rolling mean and std
-    for i in range(len(data_array)):
-        if i < window_size:
-            # Not enough data for the window yet
-            scores.append(0.0)
-            continue
-        
-        # Get window of data
-        window = data_array[i-window_size:i]
-        
-        # Calculate mean and std of window
-        window_mean = np.mean(window)
-        window_std = np.std(window)
-        
-        if window_std == 0:
-            # Avoid division by zero
-            scores.append(0.0)
-            continue
-        
-        # Calculate z-score
-        z_score = abs((data_array[i] - window_mean) / window_std)
-        scores.append(float(z_score))
+    data_array = np.asarray(data, dtype=np.float64)
+    if window_size < 1:
+        # Every window is empty, so no point has a mean or std to compare against
+        return np.empty(0, dtype=np.int64), np.full(len(data_array), np.nan), threshold
+    
+    # The window preceding each point from window_size on, as strided views
+    windows = sliding_window_view(data_array, window_size)[:-1]
+    scores = np.zeros(len(data_array))
+    
+    # Go through the windows in blocks to bound the temporaries std() allocates
+    block_size = max(1, WINDOW_BLOCK_ELEMENTS // window_size)
+    for start in range(0, len(windows), block_size):
+        block = windows[start:start + block_size]
+        points = data_array[window_size + start:window_size + start + len(block)]
         
-        # Check if anomaly
-        if z_score > threshold:
-            anomalies.append(i)
+        # Flat windows (all values equal) have no spread to compare against and score 0
+        flat = np.ptp(block, axis=1) == 0
+        window_std = np.where(flat, 1.0, block.std(axis=1))
+        z_scores = np.abs((points - block.mean(axis=1)) / window_std)
+        scores[window_size + start:window_size + start + len(block)] = np.where(flat, 0.0, z_scores)
     
-    return AnomalyDetectionResponse(
-        anomalies=anomalies,
-        scores=[float(s) for s in scores],
-        threshold=float(threshold)
-    )
+    anomalies = np.flatnonzero(scores > threshold)
+    
+    return anomalies, scores, threshold
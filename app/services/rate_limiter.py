@@ -0,0 +1,56 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List
+
+class TokenBucket:
+    """
+    Async token bucket holding up to capacity tokens, refilled continuously
+    at refill_per_sec
+
+    Callers are debited as soon as they ask and then wait out any deficit,
+    so waiters are served in arrival order without a lock.
+    """
+
+    def __init__(self, capacity: float, refill_per_sec: float):
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    async def acquire(self, tokens: float):
+        """
+        Take tokens from the bucket, waiting until they have been refilled
+        """
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.refill_per_sec)
+        self._updated = now
+
+        self._tokens -= tokens
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.refill_per_sec)
+
+class LLMRateLimiter:
+    """
+    Keep calls to one LLM provider under its concurrency and tokens-per-minute limits
+    """
+
+    def __init__(self, max_concurrency: int, tokens_per_minute: int):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket = TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+
+    @asynccontextmanager
+    async def limit(self, estimated_tokens: int) -> AsyncIterator[None]:
+        """
+        Hold a concurrency slot, and spend estimated_tokens, for the duration of a call
+        """
+        async with self._semaphore:
+            await self._bucket.acquire(estimated_tokens)
+            yield
+
+def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+    """
+    Rough token cost of a chat completion: about 4 characters per prompt
+    token, plus the completion budget
+    """
+    return sum(len(message["content"]) for message in messages) // 4 + max_tokens
@@ -1,35 +1,138 @@
+import logging
+import os
 import re
-from typing import Dict
+import numpy as np
+from typing import List, Tuple
+from app.core.config import settings
 from app.schemas.schemas import SentimentAnalysisResponse
 
+logger = logging.getLogger(__name__)
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import onnxruntime
+    from tokenizers import BertWordPieceTokenizer
+except ImportError:
+    onnxruntime = None
+
+# Define positive and negative keywords for financial text
+POSITIVE_KEYWORDS = (
+    'bullish', 'uptrend', 'growth', 'profit', 'gain', 'outperform',
+    'buy', 'strong', 'positive', 'up', 'rise', 'rising', 'rally',
+    'opportunity', 'optimistic', 'confident', 'exceed', 'beat',
+    'momentum', 'recovery', 'upgrade', 'success', 'improve'
+)
+
+NEGATIVE_KEYWORDS = (
+    'bearish', 'downtrend', 'decline', 'loss', 'risk', 'underperform',
+    'sell', 'weak', 'negative', 'down', 'fall', 'falling', 'drop',
+    'threat', 'pessimistic', 'concerned', 'miss', 'below',
+    'slowdown', 'recession', 'downgrade', 'failure', 'worsen'
+)
+
+# One case-insensitive whole-word alternation per keyword list
+POSITIVE_RE = re.compile(r'\b(?:' + '|'.join(map(re.escape, POSITIVE_KEYWORDS)) + r')\b', re.IGNORECASE)
+NEGATIVE_RE = re.compile(r'\b(?:' + '|'.join(map(re.escape, NEGATIVE_KEYWORDS)) + r')\b', re.IGNORECASE)
+
+def _build_keyword_database():
+    """
+    Compile all keywords into one Hyperscan database
+
+    Pattern ids index into POSITIVE_KEYWORDS + NEGATIVE_KEYWORDS. Each
+    pattern reports at most one match, so a scan yields the distinct
+    keywords present. Word boundaries are ASCII-only, so only ASCII text
+    may be scanned with it.
+    """
+    keywords = POSITIVE_KEYWORDS + NEGATIVE_KEYWORDS
+    flags = hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH
+    database = hyperscan.Database()
+    database.compile(
+        expressions=[rb'\b' + re.escape(keyword).encode() + rb'\b' for keyword in keywords],
+        ids=list(range(len(keywords))),
+        elements=len(keywords),
+        flags=[flags] * len(keywords)
+    )
+    return database
+
+# Hyperscan matches every keyword in a single DFA pass
+KEYWORD_DATABASE = _build_keyword_database() if hyperscan is not None else None
+
+def _build_keyword_automaton():
+    """
+    Build an Aho-Corasick automaton over all keywords
+
+    Each keyword maps to (is_positive, keyword). Word boundaries are
+    checked per match, so it works on any (lowercased) text.
+    """
+    automaton = ahocorasick.Automaton()
+    for keyword in POSITIVE_KEYWORDS:
+        automaton.add_word(keyword, (True, keyword))
+    for keyword in NEGATIVE_KEYWORDS:
+        automaton.add_word(keyword, (False, keyword))
+    automaton.make_automaton()
+    return automaton
+
+# Aho-Corasick has the least per-call overhead on short texts
+KEYWORD_AUTOMATON = _build_keyword_automaton() if ahocorasick is not None else None
+
+# Texts shorter than this go through the automaton rather than Hyperscan
+SHORT_TEXT_LENGTH = 200
+
+def _is_word_char(char: str) -> bool:
+    """
+    Same character class as \w in re
+    """
+    return char.isalnum() or char == '_'
+
+def _count_keywords(text: str) -> Tuple[int, int]:
+    """
+    Count the distinct positive and negative keywords present in text
+    """
+    if KEYWORD_DATABASE is not None and len(text) >= SHORT_TEXT_LENGTH and text.isascii():
+        matched = set()
+        KEYWORD_DATABASE.scan(text.encode('ascii'), match_event_handler=lambda id, *_: matched.add(id))
+        positive_count = sum(1 for id in matched if id < len(POSITIVE_KEYWORDS))
+        return positive_count, len(matched) - positive_count
+    
+    if KEYWORD_AUTOMATON is not None:
+        text_lower = text.lower()
+        positive, negative = set(), set()
+        for end, (is_positive, keyword) in KEYWORD_AUTOMATON.iter(text_lower):
+            start = end - len(keyword) + 1
+            # Only count whole words, like \b...\b
+            if start > 0 and _is_word_char(text_lower[start - 1]):
+                continue
+            if end + 1 < len(text_lower) and _is_word_char(text_lower[end + 1]):
+                continue
+            (positive if is_positive else negative).add(keyword)
+        return len(positive), len(negative)
+    
+    positive_count = len({match.lower() for match in POSITIVE_RE.findall(text)})
+    negative_count = len({match.lower() for match in NEGATIVE_RE.findall(text)})
+    return positive_count, negative_count
+
 def analyze_sentiment(text: str) -> SentimentAnalysisResponse:
     """
     Analyze sentiment of financial text using a keyword-based approach
     
     This is a simplified implementation that uses keyword matching.
-    In a production environment, a pre-trained model like FinBERT would be used.
+    Batched requests use FinBERT instead when a model is configured (see
+    analyze_sentiment_batch).
     """
-    # Convert to lowercase for case-insensitive matching
-    text_lower = text.lower()
+    if not text.strip():
+        return _empty_text_sentiment()
     
-    # Define positive and negative keywords for financial text
-    positive_keywords = [
-        'bullish', 'uptrend', 'growth', 'profit', 'gain', 'outperform',
-        'buy', 'strong', 'positive', 'up', 'rise', 'rising', 'rally',
-        'opportunity', 'optimistic', 'confident', 'exceed', 'beat',
-        'momentum', 'recovery', 'upgrade', 'success', 'improve'
-    ]
-    
-    negative_keywords = [
-        'bearish', 'downtrend', 'decline', 'loss', 'risk', 'underperform',
-        'sell', 'weak', 'negative', 'down', 'fall', 'falling', 'drop',
-        'threat', 'pessimistic', 'concerned', 'miss', 'below',
-        'slowdown', 'recession', 'downgrade', 'failure', 'worsen'
-    ]
-    
-    # Count occurrences of keywords
-    positive_count = sum(1 for keyword in positive_keywords if re.search(r'\b' + keyword + r'\b', text_lower))
-    negative_count = sum(1 for keyword in negative_keywords if re.search(r'\b' + keyword + r'\b', text_lower))
+    # Count distinct keywords present
+    positive_count, negative_count = _count_keywords(text)
     
     # Calculate sentiment score (-1 to 1)
     total_count = positive_count + negative_count
@@ -57,3 +160,98 @@ def analyze_sentiment(text: str) -> SentimentAnalysisResponse:
         score=sentiment_score,
         explanation=explanation
     )
+
+def _empty_text_sentiment() -> SentimentAnalysisResponse:
+    """
+    Result for text with nothing to analyze
+    """
+    return SentimentAnalysisResponse(
+        sentiment="neutral",
+        score=0.0,
+        explanation="Empty text."
+    )
+
+class _FinBERTRunner:
+    """
+    Int8-quantized FinBERT served with ONNX Runtime on the CPU
+
+    Texts are tokenized and classified a whole batch at a time, so the
+    fixed cost of each model run is shared by every text in it.
+    """
+
+    # Output order of the ProsusAI/finbert classification head
+    LABELS = ("positive", "negative", "neutral")
+
+    def __init__(self, model_dir: str, num_threads: int = 0, max_length: int = 128):
+        options = onnxruntime.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, "finbert_int8.onnx"),
+            options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        self.tokenizer = BertWordPieceTokenizer(os.path.join(model_dir, "vocab.txt"), lowercase=True)
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.enable_padding()
+
+    def predict(self, texts: List[str]) -> List[SentimentAnalysisResponse]:
+        """
+        Classify a batch of texts with one model run
+        """
+        encodings = self.tokenizer.encode_batch(texts)
+        inputs = {
+            "input_ids": np.array([encoding.ids for encoding in encodings], dtype=np.int64),
+            "attention_mask": np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64),
+            "token_type_ids": np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+        }
+        logits = self.session.run(None, {name: value for name, value in inputs.items() if name in self.input_names})[0]
+
+        # Softmax over the three classes
+        probabilities = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+
+        results = []
+        for positive, negative, neutral in probabilities.tolist():
+            sentiment, confidence = max(zip(self.LABELS, (positive, negative, neutral)), key=lambda item: item[1])
+            results.append(SentimentAnalysisResponse(
+                sentiment=sentiment,
+                score=positive - negative,
+                explanation=f"FinBERT classified the text as {sentiment} with {confidence:.0%} confidence."
+            ))
+        return results
+
+def _load_finbert():
+    """
+    Load the FinBERT runner if a model is configured and ONNX Runtime is installed
+    """
+    if not settings.FINBERT_MODEL_DIR:
+        return None
+    if onnxruntime is None:
+        logger.warning("FINBERT_MODEL_DIR is set but onnxruntime/tokenizers are not installed (see requirements-finbert.txt)")
+        return None
+    try:
+        return _FinBERTRunner(settings.FINBERT_MODEL_DIR, settings.FINBERT_NUM_THREADS)
+    except Exception:
+        logger.exception("Error loading FinBERT model")
+        return None
+
+# Model-backed analyzer; None means keyword matching is used instead
+FINBERT_RUNNER = _load_finbert()
+
+def analyze_sentiment_batch(texts: List[str]) -> List[SentimentAnalysisResponse]:
+    """
+    Analyze sentiment of several texts in one call
+
+    Uses FinBERT when it is loaded, classifying the whole batch in one model
+    run, and keyword matching otherwise.
+    """
+    if FINBERT_RUNNER is not None:
+        # Blank texts skip the model
+        non_empty = [text for text in texts if text.strip()]
+        predictions = iter(FINBERT_RUNNER.predict(non_empty) if non_empty else [])
+        return [next(predictions) if text.strip() else _empty_text_sentiment() for text in texts]
+    
+    return [analyze_sentiment(text) for text in texts]
@@ -0,0 +1,83 @@
+import asyncio
+from typing import Callable, List, Optional, Tuple
+from app.schemas.schemas import SentimentAnalysisResponse
+from app.services.sentiment_analysis_service import analyze_sentiment_batch
+
+class SentimentBatcher:
+    """
+    Coalesce concurrent sentiment requests into batched analyzer calls
+
+    Texts submitted while a batch is being collected are analyzed together
+    in a single call, up to max_batch texts or max_wait seconds after the
+    first one arrived.
+    """
+
+    def __init__(
+        self,
+        analyze_batch: Callable[[List[str]], List[SentimentAnalysisResponse]],
+        max_batch: int = 32,
+        max_wait: float = 0.01
+    ):
+        self.analyze_batch = analyze_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, text: str) -> SentimentAnalysisResponse:
+        """
+        Queue text for analysis and wait for its result
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker.done():
+            # Started lazily so the queue and task belong to the running loop
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+        future = loop.create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _run(self):
+        """
+        Collect batches from the queue and resolve their futures
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._resolve(batch)
+
+    async def _resolve(self, batch: List[Tuple[str, asyncio.Future]]):
+        """
+        Analyze one batch and hand each caller its result (or the error)
+
+        The analyzer runs in a worker thread so model inference doesn't
+        block the event loop; texts arriving meanwhile form the next batch.
+        """
+        try:
+            results = await asyncio.to_thread(self.analyze_batch, [text for text, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+# Shared batcher used by the sentiment endpoint
+sentiment_batcher = SentimentBatcher(analyze_sentiment_batch)
@@ -0,0 +1,90 @@
+import json
+import numpy as np
+import pytest
+from app.services.anomaly_detection_service import detect_anomalies, detect_anomalies_json
+
+def reference_anomalies(data, window_size):
+    """
+    The original per-point loop the vectorized implementation must reproduce
+    """
+    data_array = np.array(data, dtype=np.float64)
+    scores = []
+    anomalies = []
+    for i in range(len(data_array)):
+        if i < window_size:
+            scores.append(0.0)
+            continue
+        window = data_array[i-window_size:i]
+        window_std = np.std(window)
+        if window_std == 0:
+            scores.append(0.0)
+            continue
+        z_score = abs((data_array[i] - np.mean(window)) / window_std)
+        scores.append(float(z_score))
+        if z_score > 3.0:
+            anomalies.append(i)
+    return anomalies, scores
+
+def plateau_series(rng, length):
+    """Runs of repeated values with occasional jumps"""
+    return np.repeat(rng.integers(0, 5, length), rng.integers(1, 8, length))[:length].astype(float)
+
+@pytest.mark.parametrize("window_size", [1, 2, 3, 5, 20])
+def test_small_integer_series_match_reference(window_size):
+    rng = np.random.default_rng(window_size)
+    for _ in range(100):
+        data = rng.integers(0, 3, 200).astype(float).tolist()
+        result = detect_anomalies(data, window_size)
+        anomalies, scores = reference_anomalies(data, window_size)
+        assert result.anomalies == anomalies
+        np.testing.assert_allclose(result.scores, scores, rtol=1e-9, atol=1e-12)
+
+@pytest.mark.parametrize("window_size", [1, 2, 4, 10])
+def test_plateau_series_match_reference(window_size):
+    rng = np.random.default_rng(100 + window_size)
+    for _ in range(100):
+        # Power-of-two scales keep window means exact, so flat windows have std 0 in the loop too
+        data = (plateau_series(rng, 150) * rng.choice([1.0, 2.0 ** -10, 2.0 ** 20]) + rng.choice([0.0, 30000.0])).tolist()
+        result = detect_anomalies(data, window_size)
+        anomalies, scores = reference_anomalies(data, window_size)
+        assert result.anomalies == anomalies
+        np.testing.assert_allclose(result.scores, scores, rtol=1e-9, atol=1e-12)
+
+def test_flat_window_followed_by_jump_is_not_an_anomaly():
+    data = [0.0, 2.0, 1.0, 1.0, 2.0]
+    result = detect_anomalies(data, 2)
+    assert result.scores[4] == 0.0
+    assert 4 not in result.anomalies
+
+def test_constant_window_of_inexact_values_is_flat():
+    # The loop's np.std of ten copies of 0.002 is ~4e-19, not 0, so it
+    # reported a z-score around 2e15 here; a window with no spread scores 0
+    data = [0.002] * 10 + [0.001]
+    result = detect_anomalies(data, 10)
+    assert result.scores[10] == 0.0
+    assert result.anomalies == []
+
+def test_noisy_series_match_reference():
+    rng = np.random.default_rng(7)
+    data = np.r_[30000 + rng.normal(0, 500, 500), [45000], 30000 + rng.normal(0, 500, 100)].tolist()
+    result = detect_anomalies(data, 20)
+    anomalies, scores = reference_anomalies(data, 20)
+    assert 500 in result.anomalies
+    assert result.anomalies == anomalies
+    np.testing.assert_allclose(result.scores, scores, rtol=1e-9)
+
+def test_short_series_scores_zero():
+    result = detect_anomalies([1.0, 2.0], 20)
+    assert result.anomalies == []
+    assert result.scores == [0.0, 0.0]
+
+@pytest.mark.parametrize("data,window_size", [
+    ([], 20),
+    ([1.0, 2.0], 20),
+    ([5.0] * 20, 20),
+    ([1.0] * 30 + [50.0] + [1.0] * 10, 5),
+    (np.random.default_rng(3).normal(0, 1, 300).tolist(), 7)
+])
+def test_json_matches_model(data, window_size):
+    expected = json.loads(detect_anomalies(data, window_size).model_dump_json())
+    assert json.loads(detect_anomalies_json(data, window_size)) == expected